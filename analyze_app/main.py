@@ -1,12 +1,42 @@
 import os
-from fastapi import FastAPI, HTTPException
+import re
+import threading
+import time
+from collections import deque
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
+from typing import List, Optional
 import requests
+from shared.admission import AdmissionController, ensure_connected
+from shared.idea_cache import CacheMatch, IdeaIndex, idea_tokens
+from shared.upstream import UpstreamTransport
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
+# Latency SLO for a whole /analyze request; the search tier is adapted to keep the rolling p95 under it
+ANALYZE_LATENCY_SLO_MS = float(os.getenv('ANALYZE_LATENCY_SLO_MS', '45000'))
+ANALYZE_SLO_WINDOW = int(os.getenv('ANALYZE_SLO_WINDOW', '50'))
+# Admission control: concurrent pipelines, waiting requests and how long they may wait
+ANALYZE_MAX_IN_FLIGHT = int(os.getenv('ANALYZE_MAX_IN_FLIGHT', '16'))
+ANALYZE_MAX_QUEUE = int(os.getenv('ANALYZE_MAX_QUEUE', '32'))
+ANALYZE_MAX_QUEUE_WAIT_S = float(os.getenv('ANALYZE_MAX_QUEUE_WAIT_S', '10'))
+ANALYZE_RETRY_AFTER_S = int(os.getenv('ANALYZE_RETRY_AFTER_S', '5'))
+# Near-duplicate idea cache: minimum Jaccard similarity to serve a whole cached response or only
+# reuse its Reddit search, index size and entry lifetime
+IDEA_CACHE_RESPONSE_THRESHOLD = float(os.getenv('IDEA_CACHE_RESPONSE_THRESHOLD', '0.9'))
+IDEA_CACHE_SEARCH_THRESHOLD = float(os.getenv('IDEA_CACHE_SEARCH_THRESHOLD', '0.5'))
+IDEA_CACHE_MAX_ENTRIES = int(os.getenv('IDEA_CACHE_MAX_ENTRIES', '100000'))
+IDEA_CACHE_TTL_S = float(os.getenv('IDEA_CACHE_TTL_S', '86400'))
+# Upstream cassette: "record" appends every upstream call to the cassette, "replay" serves calls from it
+UPSTREAM_CASSETTE_MODE = os.getenv('UPSTREAM_CASSETTE_MODE', '')
+UPSTREAM_CASSETTE_PATH = os.getenv('UPSTREAM_CASSETTE_PATH', os.path.join(os.path.dirname(__file__), '..', 'upstream_cassette.jsonl'))
+UPSTREAM_REPLAY_SPEED = float(os.getenv('UPSTREAM_REPLAY_SPEED', '1'))
+
+if UPSTREAM_CASSETTE_MODE == "replay":
+    # Replayed calls never reach Perplexity, so no real key is needed
+    PERPLEXITY_API_KEY = PERPLEXITY_API_KEY or "replay"
 
 app = FastAPI(title="Startup Lead Scout - Analyze Service", version="1.0.0")
 
@@ -22,50 +52,113 @@ app.add_middleware(
 class AnalyzeRequest(BaseModel):
     idea: str
 
+class StageMetrics(BaseModel):
+    stage: str
+    model: str
+    latency_ms: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+
 class AnalyzeResponse(BaseModel):
     summary: str
     pain_points: str
     features: str
+    search_tier: Optional[str] = None
+    stages: List[StageMetrics] = []
+    cache_match: Optional[CacheMatch] = None
 
-@app.get("/")
-def read_root():
-    return {"message": "Analyze Service - Hello World from FastAPI!", "service": "analyze"}
+# Search tiers ordered from richest/slowest to cheapest/fastest
+SEARCH_TIERS = [
+    {"name": "pro-high", "model": "sonar-pro", "search_context_size": "high"},
+    {"name": "pro-medium", "model": "sonar-pro", "search_context_size": "medium"},
+    {"name": "pro-low", "model": "sonar-pro", "search_context_size": "low"},
+    {"name": "sonar-low", "model": "sonar", "search_context_size": "low"},
+]
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_idea(request: AnalyzeRequest):
-    if not PERPLEXITY_API_KEY:
-        raise HTTPException(status_code=500, detail="API key not set.")
+class SearchTierController:
+    """Pick the Reddit search tier from the rolling p95 request latency.
 
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-        "Content-Type": "application/json",
-        "accept": "application/json"
-    }
+    Steps down one tier when p95 exceeds the SLO and back up one tier when
+    p95 is comfortably below it. The window is cleared after each change so
+    the next decision only sees requests served at the new tier.
+    """
 
-    # 1. Extract keywords from the idea
-    extract_keywords_payload = {
-        "model": "sonar-pro",
-        "messages": [
-            {"role": "system", "content": "Extract the most relevant keywords and phrases from the following startup idea for searching on Reddit. Return a comma-separated list of keywords only."},
-            {"role": "user", "content": request.idea}
-        ]
-    }
-    try:
-        resp = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=extract_keywords_payload,
-            timeout=60
-        )
-        resp.raise_for_status()
-        keywords = resp.json()["choices"][0]["message"]["content"]
-        print("Extracted keywords:", keywords)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to extract keywords: {e}")
+    def __init__(self, slo_ms: float, window: int = 50, min_samples: int = 10, headroom: float = 0.6):
+        self.slo_ms = slo_ms
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.level = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def current_tier(self) -> dict:
+        with self.lock:
+            return SEARCH_TIERS[self.level]
+
+    def p95(self) -> Optional[float]:
+        with self.lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+            return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def record(self, latency_ms: float):
+        with self.lock:
+            self.latencies.append(latency_ms)
+            if len(self.latencies) < self.min_samples:
+                return
+            ordered = sorted(self.latencies)
+            p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            if p95 > self.slo_ms and self.level < len(SEARCH_TIERS) - 1:
+                self.level += 1
+            elif p95 < self.slo_ms * self.headroom and self.level > 0:
+                self.level -= 1
+            else:
+                return
+            self.latencies.clear()
+            print(f"Search tier changed to {SEARCH_TIERS[self.level]['name']} (p95={p95:.0f}ms, slo={self.slo_ms:.0f}ms)")
+
+search_tier_controller = SearchTierController(ANALYZE_LATENCY_SLO_MS, window=ANALYZE_SLO_WINDOW)
+
+analyze_admission = AdmissionController(
+    ANALYZE_MAX_IN_FLIGHT, ANALYZE_MAX_QUEUE, ANALYZE_MAX_QUEUE_WAIT_S, ANALYZE_RETRY_AFTER_S
+)
+
+# Past analyses, looked up by the idea text and by its extracted keywords. Each index sizes its LSH bands
+# from its own threshold, so the strict response index only collides on very similar word sets.
+idea_cache = IdeaIndex(IDEA_CACHE_RESPONSE_THRESHOLD, IDEA_CACHE_MAX_ENTRIES, IDEA_CACHE_TTL_S)
+keyword_cache = IdeaIndex(IDEA_CACHE_SEARCH_THRESHOLD, IDEA_CACHE_MAX_ENTRIES, IDEA_CACHE_TTL_S)
+
+upstream = UpstreamTransport("analyze", UPSTREAM_CASSETTE_MODE, UPSTREAM_CASSETTE_PATH, UPSTREAM_REPLAY_SPEED)
 
-    # 2. Search Reddit using those keywords
+def call_perplexity(headers: dict, payload: dict, stage: str, stages: List[StageMetrics]) -> str:
+    """POST a chat completion and record its latency and token usage"""
+    start = time.perf_counter()
+    resp = upstream.post(
+        "https://api.perplexity.ai/chat/completions",
+        headers=headers,
+        json=payload,
+        timeout=60
+    )
+    latency_ms = (time.perf_counter() - start) * 1000
+    resp.raise_for_status()
+    data = resp.json()
+    usage = data.get("usage") or {}
+    stages.append(StageMetrics(
+        stage=stage,
+        model=payload["model"],
+        latency_ms=round(latency_ms, 1),
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        total_tokens=usage.get("total_tokens", 0)
+    ))
+    return data["choices"][0]["message"]["content"]
+
+def search_reddit(headers: dict, keywords: str, tier: dict, stages: List[StageMetrics]) -> str:
+    """Ask Perplexity for Reddit discussion about the keywords at the given search tier"""
     reddit_search_payload = {
-        "model": "sonar-pro",
+        "model": tier["model"],
         "messages": [
             {
                 "role": "user",
@@ -74,81 +167,167 @@ def analyze_idea(request: AnalyzeRequest):
         ],
         "search_domain_filter": ["reddit.com"],
         "web_search_options": {
-            "search_context_size": "high"
+            "search_context_size": tier["search_context_size"]
         }
     }
     try:
-        resp = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=reddit_search_payload,
-            timeout=60
-        )
-        resp.raise_for_status()
-        reddit_results = resp.json()["choices"][0]["message"]["content"]
+        reddit_results = call_perplexity(headers, reddit_search_payload, "reddit_search", stages)
         print("Reddit search results:", reddit_results)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to search Reddit: {e}")
+    return reddit_results
 
-    # 3. Summarize findings
-    summarize_payload = {
-        "model": "sonar-pro",
-        "messages": [
-            {"role": "system", "content": "You are an expert Reddit analyst who extracts detailed, actionable insights from Reddit discussions for startup validation. Always structure your response with exactly these three sections: 1. SUMMARY:, 2. PAIN POINTS:, 3. FEATURES:. Include specific product names, brands, pricing details, and exact user quotes when available."},
-            {"role": "user", "content": f"Based on this Reddit research about '{request.idea}', provide a comprehensive structured analysis:\n\n{reddit_results}\n\nFormat your response with exactly these three sections:\n\n1. SUMMARY: [Provide detailed overview of Reddit sentiment, specific subreddits mentioned, popular brands/products discussed, and overall market reception. Include specific examples and user experiences.]\n\n2. PAIN POINTS: [List specific, detailed complaints users have mentioned. Include exact issues like battery life, pricing concerns, subscription fees, accuracy problems, etc. Format as bullet points with specific details.]\n\n3. FEATURES: [List detailed feature requests and suggestions from Reddit users. Include specific functionality, integrations, improvements, and innovations users want. Format as bullet points with comprehensive descriptions.]\n\nMake each section rich with specific details, product names, pricing information, and authentic Reddit user insights."}
-        ]
+@app.get("/")
+def read_root():
+    return {"message": "Analyze Service - Hello World from FastAPI!", "service": "analyze"}
+
+@app.get("/metrics")
+def read_metrics():
+    return {
+        "search_tier": search_tier_controller.current_tier()["name"],
+        "latency_slo_ms": search_tier_controller.slo_ms,
+        "p95_latency_ms": search_tier_controller.p95(),
+        "admission": analyze_admission.snapshot(),
+        "idea_cache_entries": len(idea_cache),
     }
-    try:
-        resp = requests.post(
-            "https://api.perplexity.ai/chat/completions",
-            headers=headers,
-            json=summarize_payload,
-            timeout=60
+
+@app.post("/analyze", response_model=AnalyzeResponse)
+def analyze_idea(request: AnalyzeRequest, disconnected: threading.Event = Depends(analyze_admission)):
+    if not PERPLEXITY_API_KEY:
+        raise HTTPException(status_code=500, detail="API key not set.")
+
+    body = request.model_dump()
+    upstream.record_inbound("/analyze", body)
+
+    # Serve a near-duplicate idea straight from the cache
+    tokens = idea_tokens(request.idea)
+    match = upstream.pinned("/analyze", body, "idea_cache", lambda: idea_cache.query(tokens))
+    if match:
+        cached, similarity = match
+        return AnalyzeResponse(
+            **cached["response"],
+            cache_match=CacheMatch(idea=cached["idea"], similarity=round(similarity, 3), reused="response")
         )
-        resp.raise_for_status()
-        summary_text = resp.json()["choices"][0]["message"]["content"]
-        print("Summary text:", summary_text)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to summarize Reddit findings: {e}")
 
-    # Try to split the summary into sections
-    summary, pain_points, features = "", "", ""
+    request_start = time.perf_counter()
+    stages: List[StageMetrics] = []
+    tier = upstream.pinned("/analyze", body, "search_tier", search_tier_controller.current_tier)
+    reused_search = False
+    succeeded = False
+    timed_out = False
+
     try:
-        # Try to parse sections by keywords with improved regex
-        import re
-        # Look for SUMMARY: section
-        summary_match = re.search(r"SUMMARY:\s*(.*?)(?=PAIN POINTS:|FEATURES:|$)", summary_text, re.IGNORECASE | re.DOTALL)
-        # Look for PAIN POINTS: section  
-        pain_points_match = re.search(r"PAIN POINTS:\s*(.*?)(?=FEATURES:|$)", summary_text, re.IGNORECASE | re.DOTALL)
-        # Look for FEATURES: section
-        features_match = re.search(r"FEATURES:\s*(.*)", summary_text, re.IGNORECASE | re.DOTALL)
+        headers = {
+            "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
+            "Content-Type": "application/json",
+            "accept": "application/json"
+        }
+
+        # 1. Extract keywords from the idea
+        extract_keywords_payload = {
+            "model": "sonar-pro",
+            "messages": [
+                {"role": "system", "content": "Extract the most relevant keywords and phrases from the following startup idea for searching on Reddit. Return a comma-separated list of keywords only."},
+                {"role": "user", "content": request.idea}
+            ]
+        }
+        try:
+            keywords = call_perplexity(headers, extract_keywords_payload, "extract_keywords", stages)
+            print("Extracted keywords:", keywords)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to extract keywords: {e}")
+        ensure_connected(disconnected)
+
+        # 2. Search Reddit using those keywords, reusing a similar idea's search when there is one
+        keyword_tokens = idea_tokens(keywords)
+        keyword_match = upstream.pinned("/analyze", body, "keyword_cache", lambda: keyword_cache.query(keyword_tokens))
+        cache_match = None
+        if keyword_match:
+            cached, similarity = keyword_match
+            reddit_results = cached["reddit_results"]
+            tier = next(t for t in SEARCH_TIERS if t["name"] == cached["response"]["search_tier"])
+            cache_match = CacheMatch(idea=cached["idea"], similarity=round(similarity, 3), reused="reddit_search")
+            reused_search = True
+        else:
+            reddit_results = search_reddit(headers, keywords, tier, stages)
+        ensure_connected(disconnected)
+
+        # 3. Summarize findings
+        summarize_payload = {
+            "model": "sonar-pro",
+            "messages": [
+                {"role": "system", "content": "You are an expert Reddit analyst who extracts detailed, actionable insights from Reddit discussions for startup validation. Always structure your response with exactly these three sections: 1. SUMMARY:, 2. PAIN POINTS:, 3. FEATURES:. Include specific product names, brands, pricing details, and exact user quotes when available."},
+                {"role": "user", "content": f"Based on this Reddit research about '{request.idea}', provide a comprehensive structured analysis:\n\n{reddit_results}\n\nFormat your response with exactly these three sections:\n\n1. SUMMARY: [Provide detailed overview of Reddit sentiment, specific subreddits mentioned, popular brands/products discussed, and overall market reception. Include specific examples and user experiences.]\n\n2. PAIN POINTS: [List specific, detailed complaints users have mentioned. Include exact issues like battery life, pricing concerns, subscription fees, accuracy problems, etc. Format as bullet points with specific details.]\n\n3. FEATURES: [List detailed feature requests and suggestions from Reddit users. Include specific functionality, integrations, improvements, and innovations users want. Format as bullet points with comprehensive descriptions.]\n\nMake each section rich with specific details, product names, pricing information, and authentic Reddit user insights."}
+            ]
+        }
+        try:
+            summary_text = call_perplexity(headers, summarize_payload, "summarize", stages)
+            print("Summary text:", summary_text)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to summarize Reddit findings: {e}")
+
+        # Try to split the summary into sections
+        summary, pain_points, features = "", "", ""
+        sections_found = False
+        try:
+            # Try to parse sections by keywords with improved regex
+            # Look for SUMMARY: section
+            summary_match = re.search(r"SUMMARY:\s*(.*?)(?=PAIN POINTS:|FEATURES:|$)", summary_text, re.IGNORECASE | re.DOTALL)
+            # Look for PAIN POINTS: section  
+            pain_points_match = re.search(r"PAIN POINTS:\s*(.*?)(?=FEATURES:|$)", summary_text, re.IGNORECASE | re.DOTALL)
+            # Look for FEATURES: section
+            features_match = re.search(r"FEATURES:\s*(.*)", summary_text, re.IGNORECASE | re.DOTALL)
         
-        if summary_match:
-            summary = summary_match.group(1).strip()
-        if pain_points_match:
-            pain_points = pain_points_match.group(1).strip()
-        if features_match:
-            features = features_match.group(1).strip()
+            if summary_match:
+                summary = summary_match.group(1).strip()
+            if pain_points_match:
+                pain_points = pain_points_match.group(1).strip()
+            if features_match:
+                features = features_match.group(1).strip()
+            sections_found = bool(summary and pain_points and features)
             
-        # Fallback if structured parsing fails
-        if not summary and not pain_points and not features:
-            # Try the old parsing method as fallback
-            summary_match = re.search(r"summary[\s\-:]*([\s\S]*?)(?:pain points|features|$)", summary_text, re.IGNORECASE)
-            pain_points_match = re.search(r"pain points[\s\-:]*([\s\S]*?)(?:features|$)", summary_text, re.IGNORECASE)
-            features_match = re.search(r"features[\s\-:]*([\s\S]*)", summary_text, re.IGNORECASE)
-            summary = summary_match.group(1).strip() if summary_match else summary_text
-            pain_points = pain_points_match.group(1).strip() if pain_points_match else "Not found in results."
-            features = features_match.group(1).strip() if features_match else "Not found in results."
-    except Exception:
-        summary = summary_text
-        pain_points = "Could not extract pain points."
-        features = "Could not extract features."
-
-    return AnalyzeResponse(
-        summary=summary,
-        pain_points=pain_points,
-        features=features
-    )
+            # Fallback if structured parsing fails
+            if not summary and not pain_points and not features:
+                # Try the old parsing method as fallback
+                summary_match = re.search(r"summary[\s\-:]*([\s\S]*?)(?:pain points|features|$)", summary_text, re.IGNORECASE)
+                pain_points_match = re.search(r"pain points[\s\-:]*([\s\S]*?)(?:features|$)", summary_text, re.IGNORECASE)
+                features_match = re.search(r"features[\s\-:]*([\s\S]*)", summary_text, re.IGNORECASE)
+                summary = summary_match.group(1).strip() if summary_match else summary_text
+                pain_points = pain_points_match.group(1).strip() if pain_points_match else "Not found in results."
+                features = features_match.group(1).strip() if features_match else "Not found in results."
+        except Exception:
+            summary = summary_text
+            pain_points = "Could not extract pain points."
+            features = "Could not extract features."
+
+        response = AnalyzeResponse(
+            summary=summary,
+            pain_points=pain_points,
+            features=features,
+            search_tier=tier["name"],
+            stages=stages,
+            cache_match=cache_match
+        )
+        # Only cache analyses whose summary parsed cleanly; fallback text would be served to every neighbor
+        if sections_found:
+            cached = {
+                "idea": request.idea,
+                "reddit_results": reddit_results,
+                "response": response.model_dump(exclude={"stages", "cache_match"}),
+            }
+            idea_cache.add(tokens, cached)
+            keyword_cache.add(keyword_tokens, cached)
+        succeeded = True
+        return response
+    except HTTPException as e:
+        timed_out = isinstance(e.__context__, requests.Timeout)
+        raise
+    finally:
+        # Timed-out requests are the slowest ones, so they count toward p95 too. Fast failures such as a
+        # 429 would drag p95 down under load, and requests that reused a cached search or lost their
+        # client say nothing about the current tier's latency.
+        if (succeeded or timed_out) and not reused_search and not disconnected.is_set():
+            search_tier_controller.record((time.perf_counter() - request_start) * 1000)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the near-duplicate idea cache lookup.
+
+Builds an IdeaIndex over a skewed synthetic corpus where a handful of common
+words ("ai", "smart", "marketplace", ...) show up in many ideas, which is what
+real idea text looks like and what crowds LSH buckets. Reports lookup latency
+percentiles for misses and near-duplicate hits, plus hit recall.
+
+Usage: python bench_idea_cache.py [--entries 100000] [--common-prob 0.15]
+"""
+import argparse
+import random
+import time
+
+from shared.idea_cache import IdeaIndex
+
+COMMON_WORDS = ["ai", "smart", "marketplace", "app", "platform", "tracker", "online", "home", "pet", "health",
+                "subscription", "mobile"]
+
+def make_idea(rng, vocab, common_prob, rare_words):
+    tokens = {word for word in COMMON_WORDS if rng.random() < common_prob}
+    tokens.update(rng.sample(vocab, rare_words))
+    return frozenset(tokens)
+
+def near_duplicate(rng, tokens, vocab):
+    """Swap one word, keeping most of the idea"""
+    kept = set(tokens)
+    kept.discard(rng.choice(sorted(kept)))
+    kept.add(rng.choice(vocab))
+    return frozenset(kept)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+def timed_queries(index, queries):
+    latencies = []
+    results = []
+    for tokens in queries:
+        start = time.perf_counter()
+        results.append(index.query(tokens))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+def report(name, latencies):
+    print(f"{name:<10} mean={sum(latencies) / len(latencies):6.3f}ms  p50={percentile(latencies, 0.5):6.3f}ms  "
+          f"p95={percentile(latencies, 0.95):6.3f}ms  p99={percentile(latencies, 0.99):6.3f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IdeaIndex lookups on a skewed corpus")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--common-prob", type=float, default=0.15, help="chance each common word is in an idea")
+    parser.add_argument("--rare-words", type=int, default=4, help="uncommon words per idea")
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocab = [f"word{i}" for i in range(args.vocab)]
+    index = IdeaIndex(args.threshold, args.entries, ttl_s=86400)
+
+    corpus = []
+    start = time.perf_counter()
+    for i in range(args.entries):
+        tokens = make_idea(rng, vocab, args.common_prob, args.rare_words)
+        corpus.append(tokens)
+        index.add(tokens, i)
+    print(f"Indexed {len(index)} ideas in {time.perf_counter() - start:.1f}s "
+          f"(common word prob {args.common_prob}, threshold {args.threshold})")
+
+    misses = [make_idea(rng, vocab, args.common_prob, args.rare_words) for _ in range(args.queries)]
+    latencies, _ = timed_queries(index, misses)
+    report("miss", latencies)
+
+    targets = [rng.choice(corpus) for _ in range(args.queries)]
+    queries = [near_duplicate(rng, tokens, vocab) for tokens in targets]
+    latencies, results = timed_queries(index, queries)
+    report("near-dup", latencies)
+    eligible = [(t, q, r) for t, q, r in zip(targets, queries, results)
+                if len(t & q) / len(t | q) >= args.threshold]
+    found = sum(1 for _, _, r in eligible if r is not None)
+    print(f"near-dup recall: {found}/{len(eligible)} queries above threshold found a match")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Reddit listing parsing in the Reach service.
+
+Compares building a pydantic RedditPost per listing child with the slotted
+PostRecord path used by RedditClient. By default it parses
+bench_data/reddit_search_listing.json, a 25-post /search.json page with
+Reddit's full t3 field set. Pass another saved listing (e.g. from
+/r/<sub>/search.json) to benchmark it instead, or --synthetic for a larger
+generated listing with only the fields the parser reads.
+
+Usage: python bench_listing_parse.py [listing.json] [--synthetic --items N]
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from reach_app.main import RedditPost, parse_post_listing
+
+DEFAULT_LISTING = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_data", "reddit_search_listing.json")
+
+def synthetic_listing(items):
+    """Build a search listing shaped like Reddit's /search.json response"""
+    children = []
+    for i in range(items):
+        children.append({
+            "kind": "t3",
+            "data": {
+                "id": f"p{i:06d}",
+                "title": f"Anyone using a GPS collar for their dog? #{i}",
+                "author": f"user_{i % 500}",
+                "subreddit": "dogs",
+                "score": i % 1000,
+                "num_comments": i % 200,
+                "url": f"https://www.reddit.com/r/dogs/comments/p{i:06d}/",
+                "permalink": f"/r/dogs/comments/p{i:06d}/anyone_using_a_gps_collar/",
+                "created_utc": 1700000000.0 + i,
+                "selftext": "Looking for recommendations on battery life and subscription costs. " * 4,
+                "thumbnail": "self",
+                "over_18": False,
+                "upvote_ratio": 0.97,
+            }
+        })
+    return {"kind": "Listing", "data": {"after": None, "before": None, "children": children}}
+
+def parse_with_pydantic(data):
+    """The previous parse path: one validated RedditPost per child"""
+    posts = []
+    for item in data.get("data", {}).get("children", []):
+        post_data = item.get("data", {})
+        posts.append(RedditPost(
+            id=post_data.get("id", ""),
+            title=post_data.get("title", ""),
+            author=post_data.get("author", ""),
+            subreddit=post_data.get("subreddit", ""),
+            score=post_data.get("score", 0),
+            num_comments=post_data.get("num_comments", 0),
+            url=post_data.get("url", ""),
+            reddit_url=f"https://reddit.com{post_data.get('permalink', '')}",
+            created_utc=post_data.get("created_utc", 0),
+            selftext=post_data.get("selftext", "")
+        ))
+    return posts
+
+def measure(name, parse, data, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(data)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = parse(data)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"{name:<12} {best / items * 1e6:8.2f} us/item   {current / items:8.0f} bytes/item retained")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Reddit listing parsing")
+    parser.add_argument("listing", nargs="?", default=DEFAULT_LISTING, help="saved listing JSON file")
+    parser.add_argument("--synthetic", action="store_true", help="use a generated listing instead of a file")
+    parser.add_argument("--items", type=int, default=1000, help="synthetic listing size")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        data = synthetic_listing(args.items)
+    else:
+        with open(args.listing) as f:
+            data = json.load(f)
+    items = len(data["data"]["children"])
+
+    source = "synthetic listing" if args.synthetic else os.path.relpath(args.listing)
+    print(f"Parsing {items} listing children from {source} (best of {args.repeat})")
+    measure("pydantic", parse_with_pydantic, data, items, args.repeat)
+    measure("PostRecord", parse_post_listing, data, items, args.repeat)
+
+if __name__ == "__main__":
+    main()
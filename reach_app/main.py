@@ -1,16 +1,47 @@
 import os
-from fastapi import FastAPI, HTTPException
+import copy
+import json
+import threading
+import time
+import uuid
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from typing import List, Optional
-import requests
+from typing import Dict, List, Optional
+from shared.admission import AdmissionController, ensure_connected
+from shared.idea_cache import CacheMatch, IdeaIndex, idea_tokens
+from shared.upstream import UpstreamTransport
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')
 REDDIT_CLIENT_ID = os.getenv('REDDIT_APP_ID') or os.getenv('REDDIT_CLIENT_ID')
 REDDIT_CLIENT_SECRET = os.getenv('REDDIT_APP_SECRET') or os.getenv('REDDIT_CLIENT_SECRET')
 REDDIT_USER_AGENT = os.getenv('REDDIT_USER_AGENT', 'StartupLeadScout/1.0')
+WATCHLIST_PATH = os.getenv('WATCHLIST_PATH', os.path.join(os.path.dirname(__file__), 'watchlist.json'))
+WATCHLIST_CRAWL_INTERVAL_S = int(os.getenv('WATCHLIST_CRAWL_INTERVAL_S', '3600'))
+WATCHLIST_MAX_POSTS = int(os.getenv('WATCHLIST_MAX_POSTS', '500'))
+# Admission control: concurrent pipelines, waiting requests and how long they may wait
+REACH_MAX_IN_FLIGHT = int(os.getenv('REACH_MAX_IN_FLIGHT', '16'))
+REACH_MAX_QUEUE = int(os.getenv('REACH_MAX_QUEUE', '32'))
+REACH_MAX_QUEUE_WAIT_S = float(os.getenv('REACH_MAX_QUEUE_WAIT_S', '10'))
+REACH_RETRY_AFTER_S = int(os.getenv('REACH_RETRY_AFTER_S', '5'))
+# Near-duplicate idea cache: minimum Jaccard similarity to serve a whole cached response or only
+# reuse its Reddit search, index size and entry lifetime
+IDEA_CACHE_RESPONSE_THRESHOLD = float(os.getenv('IDEA_CACHE_RESPONSE_THRESHOLD', '0.9'))
+IDEA_CACHE_SEARCH_THRESHOLD = float(os.getenv('IDEA_CACHE_SEARCH_THRESHOLD', '0.5'))
+IDEA_CACHE_MAX_ENTRIES = int(os.getenv('IDEA_CACHE_MAX_ENTRIES', '100000'))
+IDEA_CACHE_TTL_S = float(os.getenv('IDEA_CACHE_TTL_S', '86400'))
+# Upstream cassette: "record" appends every upstream call to the cassette, "replay" serves calls from it
+UPSTREAM_CASSETTE_MODE = os.getenv('UPSTREAM_CASSETTE_MODE', '')
+UPSTREAM_CASSETTE_PATH = os.getenv('UPSTREAM_CASSETTE_PATH', os.path.join(os.path.dirname(__file__), '..', 'upstream_cassette.jsonl'))
+UPSTREAM_REPLAY_SPEED = float(os.getenv('UPSTREAM_REPLAY_SPEED', '1'))
+
+if UPSTREAM_CASSETTE_MODE == "replay":
+    # Replayed calls never reach Perplexity or Reddit, so no real credentials are needed
+    PERPLEXITY_API_KEY = PERPLEXITY_API_KEY or "replay"
+    REDDIT_CLIENT_ID = REDDIT_CLIENT_ID or "replay"
+    REDDIT_CLIENT_SECRET = REDDIT_CLIENT_SECRET or "replay"
 
 app = FastAPI(title="Startup Lead Scout - Reach Service", version="1.0.0")
 
@@ -57,12 +88,54 @@ class RedditUser(BaseModel):
     is_verified: bool
     relevance_score: float
 
+class PostRecord:
+    """Post parsed straight from a listing child.
+
+    Listings can hold hundreds of children, so posts stay as slotted records
+    internally and are validated as RedditPost once, when the response is built.
+    """
+    __slots__ = ("id", "title", "author", "subreddit", "score", "num_comments", "url", "reddit_url",
+                 "created_utc", "selftext")
+
+    def __init__(self, data: dict):
+        get = data.get
+        self.id = get("id") or ""
+        self.title = get("title") or ""
+        self.author = get("author") or ""
+        self.subreddit = get("subreddit") or ""
+        self.score = get("score") or 0
+        self.num_comments = get("num_comments") or 0
+        self.url = get("url") or ""
+        self.reddit_url = "https://reddit.com" + (get("permalink") or "")
+        self.created_utc = get("created_utc") or 0
+        self.selftext = get("selftext") or ""
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in PostRecord.__slots__}
+
+def parse_post_listing(data: Optional[dict]) -> List[PostRecord]:
+    """Convert a Reddit listing into PostRecords"""
+    if not data:
+        return []
+    children = (data.get("data") or {}).get("children") or []
+    return [PostRecord(child["data"]) for child in children if child.get("data")]
+
 class ReachResponse(BaseModel):
     relevant_posts: List[RedditPost]
     active_comments: List[RedditComment]
     key_users: List[RedditUser]
     search_strategy: str
     recommended_subreddits: List[str]
+    cache_match: Optional[CacheMatch] = None
+
+class WatchedIdea(BaseModel):
+    id: str
+    idea: str
+    created_utc: float
+    last_crawled_utc: Optional[float] = None
+    post_count: int
+
+upstream = UpstreamTransport("reach", UPSTREAM_CASSETTE_MODE, UPSTREAM_CASSETTE_PATH, UPSTREAM_REPLAY_SPEED)
 
 class PerplexityClient:
     def __init__(self, api_key: str):
@@ -72,6 +145,8 @@ class PerplexityClient:
             "Content-Type": "application/json",
             "accept": "application/json"
         }
+        # Set when get_search_strategy had to fall back to a generic strategy
+        self.used_fallback = False
     
     def get_search_strategy(self, idea: str) -> dict:
         """Use Perplexity to determine Reddit search strategy"""
@@ -100,7 +175,7 @@ class PerplexityClient:
         }
         
         try:
-            resp = requests.post(
+            resp = upstream.post(
                 "https://api.perplexity.ai/chat/completions",
                 headers=self.headers,
                 json=payload,
@@ -117,6 +192,7 @@ class PerplexityClient:
                 return json.loads(json_match.group())
             else:
                 # Fallback parsing
+                self.used_fallback = True
                 return {
                     "keywords": result.split('\n')[0] if result else idea,
                     "subreddits": ["startups", "entrepreneur", "business"],
@@ -127,6 +203,7 @@ class PerplexityClient:
         except Exception as e:
             print(f"Strategy generation failed: {e}")
             # Fallback strategy
+            self.used_fallback = True
             return {
                 "keywords": idea,
                 "subreddits": ["startups", "entrepreneur", "business"],
@@ -142,6 +219,8 @@ class RedditClient:
         self.user_agent = user_agent
         self.access_token = None
         self.base_url = "https://www.reddit.com"
+        # Failed requests are logged and treated as empty, so callers check this before trusting results
+        self.failed_requests = 0
         self._authenticate()
     
     def _authenticate(self):
@@ -152,10 +231,11 @@ class RedditClient:
         data = {"grant_type": "client_credentials"}
         
         try:
-            resp = requests.post(auth_url, auth=auth, headers=headers, data=data)
+            resp = upstream.post(auth_url, auth=auth, headers=headers, data=data)
             resp.raise_for_status()
             self.access_token = resp.json()["access_token"]
         except Exception as e:
+            self.failed_requests += 1
             print(f"Reddit authentication failed: {e}")
     
     def _make_request(self, endpoint: str, params: dict = None):
@@ -170,43 +250,58 @@ class RedditClient:
         
         url = f"https://oauth.reddit.com{endpoint}"
         try:
-            resp = requests.get(url, headers=headers, params=params or {})
+            resp = upstream.get(url, headers=headers, params=params or {})
             resp.raise_for_status()
             return resp.json()
         except Exception as e:
+            self.failed_requests += 1
             print(f"Reddit API request failed: {e}")
             return None
     
-    def search_posts(self, query: str, subreddit: str = None, limit: int = 25, time_filter: str = "month"):
-        """Search Reddit posts"""
+    def _search_listing(self, query: str, subreddit: str = None, limit: int = 25, time_filter: str = "month",
+                        sort: str = "hot", after: str = None):
+        """Fetch one page of a Reddit search listing"""
         if subreddit:
             endpoint = f"/r/{subreddit}/search"
-            params = {"q": query, "restrict_sr": "true", "sort": "hot", "t": time_filter, "limit": limit}
+            params = {"q": query, "restrict_sr": "true", "sort": sort, "t": time_filter, "limit": limit}
         else:
             endpoint = "/search"
-            params = {"q": query, "sort": "hot", "t": time_filter, "limit": limit, "type": "link"}
-        
-        data = self._make_request(endpoint, params)
-        if not data:
-            return []
-        
+            params = {"q": query, "sort": sort, "t": time_filter, "limit": limit, "type": "link"}
+        if after:
+            params["after"] = after
+        return self._make_request(endpoint, params)
+
+    def search_posts(self, query: str, subreddit: str = None, limit: int = 25, time_filter: str = "month",
+                     sort: str = "hot"):
+        """Search Reddit posts"""
+        data = self._search_listing(query, subreddit, limit, time_filter, sort)
+        return parse_post_listing(data)
+
+    def search_new_posts(self, query: str, subreddit: str = None, since_utc: float = 0, limit: int = 25,
+                         max_pages: int = 4):
+        """Search Reddit posts newer than since_utc, newest first.
+
+        Walks the sort=new listing with its after cursor and stops at the first
+        post at or below the high-water mark, so cost tracks the number of new posts.
+        Also returns whether the walk got back to since_utc or the end of the listing.
+        It did not if a page failed or max_pages ran out, so posts may be missing.
+        """
         posts = []
-        for item in data.get("data", {}).get("children", []):
-            post_data = item.get("data", {})
-            posts.append(RedditPost(
-                id=post_data.get("id", ""),
-                title=post_data.get("title", ""),
-                author=post_data.get("author", ""),
-                subreddit=post_data.get("subreddit", ""),
-                score=post_data.get("score", 0),
-                num_comments=post_data.get("num_comments", 0),
-                url=post_data.get("url", ""),
-                reddit_url=f"https://reddit.com{post_data.get('permalink', '')}",
-                created_utc=post_data.get("created_utc", 0),
-                selftext=post_data.get("selftext", "")
-            ))
-        return posts
-    
+        after = None
+        for _ in range(max_pages):
+            data = self._search_listing(query, subreddit, limit, "all", "new", after)
+            if data is None:
+                return posts, False
+            page = parse_post_listing(data)
+            for post in page:
+                if post.created_utc <= since_utc:
+                    return posts, True
+                posts.append(post)
+            after = (data.get("data") or {}).get("after")
+            if not after or len(page) < limit:
+                return posts, True
+        return posts, False
+
     def get_user_info(self, username: str):
         """Get Reddit user information"""
         endpoint = f"/user/{username}/about"
@@ -226,30 +321,283 @@ class RedditClient:
             relevance_score=0.0  # Will be calculated by Perplexity
         )
 
+reach_admission = AdmissionController(REACH_MAX_IN_FLIGHT, REACH_MAX_QUEUE, REACH_MAX_QUEUE_WAIT_S, REACH_RETRY_AFTER_S)
+watchlist_admission = AdmissionController(REACH_MAX_IN_FLIGHT, REACH_MAX_QUEUE, REACH_MAX_QUEUE_WAIT_S, REACH_RETRY_AFTER_S)
+
+# Past reach results, looked up by the idea text and by the strategy keywords. Each index sizes its LSH bands
+# from its own threshold, so the strict response index only collides on very similar word sets.
+idea_cache = IdeaIndex(IDEA_CACHE_RESPONSE_THRESHOLD, IDEA_CACHE_MAX_ENTRIES, IDEA_CACHE_TTL_S)
+keyword_cache = IdeaIndex(IDEA_CACHE_SEARCH_THRESHOLD, IDEA_CACHE_MAX_ENTRIES, IDEA_CACHE_TTL_S)
+
+def describe_strategy(strategy: dict) -> str:
+    return f"Strategy: {strategy.get('keywords', '')} in subreddits: {', '.join(strategy.get('subreddits', []))}"
+
+class WatchlistStore:
+    """Watched ideas with their saved strategy, merged posts and per-source high-water marks.
+
+    Kept in memory and mirrored to a JSON file so the watchlist survives restarts.
+    Entries are handed out as copies, since merge updates the stored ones in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.items: Dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.items = json.load(f)
+            except Exception as e:
+                print(f"Failed to load watchlist from {path}: {e}")
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.items, f)
+        os.replace(tmp_path, self.path)
+
+    def add(self, idea: str, strategy: dict) -> dict:
+        entry = {
+            "id": uuid.uuid4().hex[:12],
+            "idea": idea,
+            "strategy": strategy,
+            "created_utc": time.time(),
+            "last_crawled_utc": None,
+            "high_water": {},
+            "posts": [],
+            "key_users": [],
+        }
+        with self.lock:
+            self.items[entry["id"]] = entry
+            self._save()
+            return copy.deepcopy(entry)
+
+    def get(self, watch_id: str) -> Optional[dict]:
+        with self.lock:
+            return copy.deepcopy(self.items.get(watch_id))
+
+    def all(self) -> List[dict]:
+        with self.lock:
+            return copy.deepcopy(list(self.items.values()))
+
+    def remove(self, watch_id: str) -> bool:
+        with self.lock:
+            if self.items.pop(watch_id, None) is None:
+                return False
+            self._save()
+            return True
+
+    def merge(self, watch_id: str, new_posts: List[PostRecord], high_water: Dict[str, float],
+              new_users: List[RedditUser]):
+        with self.lock:
+            entry = self.items.get(watch_id)
+            if entry is None:
+                return
+            seen = {post["id"] for post in entry["posts"]}
+            fresh = []
+            # Subreddit and global searches often return the same post within one crawl
+            for post in new_posts:
+                if post.id not in seen:
+                    seen.add(post.id)
+                    fresh.append(post.to_dict())
+            posts = fresh + entry["posts"]
+            posts.sort(key=lambda post: post["created_utc"], reverse=True)
+            entry["posts"] = posts[:WATCHLIST_MAX_POSTS]
+            entry["high_water"].update(high_water)
+            entry["key_users"].extend(user.model_dump() for user in new_users)
+            entry["last_crawled_utc"] = time.time()
+            self._save()
+
+watchlist = WatchlistStore(WATCHLIST_PATH)
+
+def strategy_sources(strategy: dict) -> List[Optional[str]]:
+    """Subreddits searched for a strategy, plus None for the global search"""
+    return strategy.get("subreddits", [])[:5] + [None]
+
+def crawl_watched_idea(entry: dict, reddit: RedditClient):
+    """Fetch posts newer than each source's high-water mark and merge them into the entry"""
+    strategy = entry["strategy"]
+    query = strategy.get("keywords", entry["idea"])
+    new_posts = []
+    high_water = {}
+    for subreddit in strategy_sources(strategy):
+        source = subreddit or "*"
+        since = entry["high_water"].get(source, 0)
+        posts, complete = reddit.search_new_posts(
+            query=query,
+            subreddit=subreddit,
+            since_utc=since,
+            limit=10 if subreddit else 15,
+            # The first crawl only seeds the high-water mark with the latest page
+            max_pages=4 if since else 1
+        )
+        # Keep the old mark after a partial walk, so the next crawl retries the gap instead of skipping it
+        if posts and (complete or not since):
+            high_water[source] = max(post.created_utc for post in posts)
+        new_posts.extend(posts)
+
+    known_users = {user["username"] for user in entry["key_users"]}
+    new_users = []
+    for username in dict.fromkeys(post.author for post in new_posts if post.author and post.author != "[deleted]"):
+        if len(known_users) + len(new_users) >= 10:
+            break
+        if username in known_users:
+            continue
+        user_info = reddit.get_user_info(username)
+        if user_info:
+            new_users.append(user_info)
+
+    watchlist.merge(entry["id"], new_posts, high_water, new_users)
+    print(f"Watchlist crawl for {entry['id']}: {len(new_posts)} new posts")
+
+def watched_summary(entry: dict) -> WatchedIdea:
+    return WatchedIdea(
+        id=entry["id"],
+        idea=entry["idea"],
+        created_utc=entry["created_utc"],
+        last_crawled_utc=entry["last_crawled_utc"],
+        post_count=len(entry["posts"])
+    )
+
+def run_watchlist_scheduler():
+    """Periodically crawl every watched idea for new posts"""
+    while True:
+        time.sleep(WATCHLIST_CRAWL_INTERVAL_S)
+        entries = watchlist.all()
+        if not entries:
+            continue
+        reddit = RedditClient(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)
+        for entry in entries:
+            try:
+                crawl_watched_idea(entry, reddit)
+            except Exception as e:
+                print(f"Watchlist crawl for {entry['id']} failed: {e}")
+
+@app.on_event("startup")
+def start_watchlist_scheduler():
+    if WATCHLIST_CRAWL_INTERVAL_S > 0 and REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET:
+        threading.Thread(target=run_watchlist_scheduler, daemon=True).start()
+
 @app.get("/")
 def read_root():
     return {"message": "Reach Service - Hello World from FastAPI!", "service": "reach"}
 
+@app.get("/metrics")
+def read_metrics():
+    return {
+        "admission": {
+            "reach": reach_admission.snapshot(),
+            "watchlist": watchlist_admission.snapshot(),
+        },
+        "idea_cache_entries": len(idea_cache),
+    }
+
+@app.post("/watchlist", response_model=WatchedIdea)
+def add_watched_idea(request: ReachRequest, disconnected: threading.Event = Depends(watchlist_admission)):
+    if not PERPLEXITY_API_KEY:
+        raise HTTPException(status_code=500, detail="Perplexity API key not set.")
+
+    if not REDDIT_CLIENT_ID or not REDDIT_CLIENT_SECRET:
+        raise HTTPException(status_code=500, detail="Reddit API credentials not set.")
+
+    perplexity = PerplexityClient(PERPLEXITY_API_KEY)
+    strategy = perplexity.get_search_strategy(request.idea)
+    # The strategy is kept for every later crawl, so never save the generic fallback
+    if perplexity.used_fallback:
+        raise HTTPException(status_code=500, detail="Failed to generate a search strategy.")
+    ensure_connected(disconnected)
+
+    reddit = RedditClient(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)
+    entry = watchlist.add(request.idea, strategy)
+    try:
+        crawl_watched_idea(entry, reddit)
+    except Exception as e:
+        print(f"Initial watchlist crawl failed: {e}")
+    entry = watchlist.get(entry["id"])
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Watched idea not found.")
+    return watched_summary(entry)
+
+@app.get("/watchlist", response_model=List[WatchedIdea])
+def list_watched_ideas():
+    return [watched_summary(entry) for entry in watchlist.all()]
+
+@app.get("/watchlist/{watch_id}", response_model=ReachResponse)
+def get_watched_idea(watch_id: str):
+    entry = watchlist.get(watch_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Watched idea not found.")
+
+    strategy = entry["strategy"]
+    return ReachResponse(
+        relevant_posts=entry["posts"],
+        active_comments=[],
+        key_users=entry["key_users"],
+        search_strategy=describe_strategy(strategy),
+        recommended_subreddits=strategy.get("subreddits", [])
+    )
+
+@app.delete("/watchlist/{watch_id}")
+def remove_watched_idea(watch_id: str):
+    if not watchlist.remove(watch_id):
+        raise HTTPException(status_code=404, detail="Watched idea not found.")
+    return {"removed": watch_id}
+
 @app.post("/reach", response_model=ReachResponse)
-def reach_analysis(request: ReachRequest):
+def reach_analysis(request: ReachRequest, disconnected: threading.Event = Depends(reach_admission)):
     if not PERPLEXITY_API_KEY:
         raise HTTPException(status_code=500, detail="Perplexity API key not set.")
     
     if not REDDIT_CLIENT_ID or not REDDIT_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Reddit API credentials not set.")
     
-    # Initialize clients
+    body = request.model_dump()
+    upstream.record_inbound("/reach", body)
+    
+    # Serve a near-duplicate idea straight from the cache
+    tokens = idea_tokens(request.idea)
+    match = upstream.pinned("/reach", body, "idea_cache", lambda: idea_cache.query(tokens))
+    if match:
+        cached, similarity = match
+        return ReachResponse(
+            **cached["response"],
+            cache_match=CacheMatch(idea=cached["idea"], similarity=round(similarity, 3), reused="response")
+        )
+    
     perplexity = PerplexityClient(PERPLEXITY_API_KEY)
-    reddit = RedditClient(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)
     
     try:
         # Step 1: Get search strategy from Perplexity
         strategy = perplexity.get_search_strategy(request.idea)
         print(f"Search strategy: {strategy}")
         
+        # A similar idea with matching keywords already has the Reddit results
+        keyword_tokens = idea_tokens(str(strategy.get("keywords", request.idea)))
+        keyword_match = upstream.pinned(
+            "/reach", body, "keyword_cache",
+            lambda: None if perplexity.used_fallback else keyword_cache.query(keyword_tokens)
+        )
+        if keyword_match:
+            # Keep this idea's strategy; only the posts and users come from the neighbor's search
+            cached, similarity = keyword_match
+            response = ReachResponse(
+                relevant_posts=cached["response"]["relevant_posts"],
+                active_comments=[],
+                key_users=cached["response"]["key_users"],
+                search_strategy=describe_strategy(strategy),
+                recommended_subreddits=strategy.get("subreddits", []),
+                cache_match=CacheMatch(idea=cached["idea"], similarity=round(similarity, 3), reused="reddit_search")
+            )
+            idea_cache.add(tokens, {"idea": request.idea, "response": response.model_dump(exclude={"cache_match"})})
+            return response
+        
+        # Creating the client fetches an OAuth token, so only do it once Reddit is actually needed
+        reddit = RedditClient(REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT)
+        
         # Step 2: Search Reddit using the strategy
         all_posts = []
         for subreddit in strategy.get("subreddits", [])[:5]:  # Limit to avoid rate limits
+            ensure_connected(disconnected)
             posts = reddit.search_posts(
                 query=strategy.get("keywords", request.idea),
                 subreddit=subreddit,
@@ -266,15 +614,15 @@ def reach_analysis(request: ReachRequest):
         )
         all_posts.extend(global_posts)
         
-        # Step 4: Get unique users from posts
-        unique_users = set()
-        for post in all_posts:
-            if post.author and post.author != "[deleted]":
-                unique_users.add(post.author)
+        # Step 4: Get unique users from posts, in first-seen order so a replay looks up the same users
+        unique_users = dict.fromkeys(
+            post.author for post in all_posts if post.author and post.author != "[deleted]"
+        )
         
         # Step 5: Get user information for top users (limit to avoid rate limits)
         key_users = []
         for username in list(unique_users)[:10]:
+            ensure_connected(disconnected)
             user_info = reddit.get_user_info(username)
             if user_info:
                 key_users.append(user_info)
@@ -282,14 +630,22 @@ def reach_analysis(request: ReachRequest):
         # For now, return mock comments - will implement comment search in next iteration
         active_comments = []
         
-        return ReachResponse(
-            relevant_posts=all_posts[:20],  # Limit results
+        response = ReachResponse(
+            relevant_posts=[post.to_dict() for post in all_posts[:20]],  # Limit results
             active_comments=active_comments,
             key_users=key_users,
-            search_strategy=f"Strategy: {strategy.get('keywords', '')} in subreddits: {', '.join(strategy.get('subreddits', []))}",
+            search_strategy=describe_strategy(strategy),
             recommended_subreddits=strategy.get("subreddits", [])
         )
+        # A generic fallback strategy or failed Reddit calls would poison the cache for every neighbor
+        if not perplexity.used_fallback and not reddit.failed_requests and all_posts:
+            cached = {"idea": request.idea, "response": response.model_dump(exclude={"cache_match"})}
+            idea_cache.add(tokens, cached)
+            keyword_cache.add(keyword_tokens, cached)
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reach analysis failed: {str(e)}")
 
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Rerun a recorded workload offline against an upstream cassette.
+
+Record a cassette by running the services with UPSTREAM_CASSETTE_MODE=record
+(and optionally UPSTREAM_CASSETTE_PATH). This script then replays the recorded
+/analyze and /reach requests at their original pacing, divided by --speed,
+with every Perplexity and Reddit call answered from the cassette.
+
+Usage: python replay_workload.py upstream_cassette.jsonl [--speed 10] [--service analyze|reach]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+def load_inbound(path, service):
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    inbound = [e for e in entries if e.get("kind") == "inbound" and (service is None or e["service"] == service)]
+    return sorted(inbound, key=lambda e: e["ts"])
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded workload from an upstream cassette")
+    parser.add_argument("cassette", help="JSONL cassette written in record mode")
+    parser.add_argument("--speed", type=float, default=1.0, help="speed-up for pacing and upstream latency, 0 for none")
+    parser.add_argument("--service", choices=["analyze", "reach"], help="only replay one service")
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    # The services read these at import time
+    os.environ["UPSTREAM_CASSETTE_MODE"] = "replay"
+    os.environ["UPSTREAM_CASSETTE_PATH"] = args.cassette
+    os.environ["UPSTREAM_REPLAY_SPEED"] = str(args.speed)
+    os.environ.setdefault("WATCHLIST_CRAWL_INTERVAL_S", "0")
+
+    from analyze_app import main as analyze_main
+    from reach_app import main as reach_main
+
+    handlers = {
+        "/analyze": lambda body: analyze_main.analyze_idea(analyze_main.AnalyzeRequest(**body), threading.Event()),
+        "/reach": lambda body: reach_main.reach_analysis(reach_main.ReachRequest(**body), threading.Event()),
+    }
+
+    inbound = load_inbound(args.cassette, args.service)
+    if not inbound:
+        print("No recorded requests in cassette")
+        return
+    print(f"Replaying {len(inbound)} requests at {args.speed}x")
+
+    def run(entry):
+        start = time.perf_counter()
+        try:
+            handlers[entry["endpoint"]](entry["body"])
+            status = "ok"
+        except Exception as e:
+            status = f"error: {getattr(e, 'detail', e)}"
+        return entry["endpoint"], (time.perf_counter() - start) * 1000, status
+
+    replay_start = time.perf_counter()
+    first_ts = inbound[0]["ts"]
+    futures = []
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        for entry in inbound:
+            if args.speed > 0:
+                delay = (entry["ts"] - first_ts) / args.speed - (time.perf_counter() - replay_start)
+                if delay > 0:
+                    time.sleep(delay)
+            futures.append(executor.submit(run, entry))
+        results = [future.result() for future in futures]
+
+    for endpoint in sorted({r[0] for r in results}):
+        latencies = [r[1] for r in results if r[0] == endpoint]
+        errors = [r[2] for r in results if r[0] == endpoint and r[2] != "ok"]
+        print(f"{endpoint:<10} n={len(latencies):<5} p50={percentile(latencies, 0.5):8.1f}ms "
+              f"p95={percentile(latencies, 0.95):8.1f}ms errors={len(errors)}")
+        for error in errors[:5]:
+            print(f"    {error}")
+    print(f"Total wall time: {time.perf_counter() - replay_start:.1f}s")
+
+if __name__ == "__main__":
+    main()
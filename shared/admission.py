@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from fastapi import HTTPException, Request
+
+class AdmissionController:
+    """Bound the number of in-flight pipelines for an endpoint.
+
+    Used as an async dependency so waiting happens on the event loop rather than
+    in a threadpool slot. Requests beyond the wait queue, or that wait longer than
+    max_wait_s, get a 503 with Retry-After. The yielded event is set when the
+    client disconnects so the handler can stop between upstream calls.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, max_wait_s: float, retry_after_s: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.retry_after_s = retry_after_s
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.shed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+
+    def _reject(self, detail: str):
+        raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(self.retry_after_s)})
+
+    async def _watch_disconnect(self, http_request: Request, disconnected: threading.Event):
+        while not disconnected.is_set():
+            if await http_request.is_disconnected():
+                disconnected.set()
+                return
+            await asyncio.sleep(0.5)
+
+    async def __call__(self, http_request: Request):
+        # Take a queue slot before the first await, so a burst arriving in one event-loop tick is counted
+        if self.in_flight + self.queued >= self.max_in_flight + self.max_queue:
+            self.shed += 1
+            self._reject("Server busy, try again later.")
+
+        self.queued += 1
+        acquired = False
+        try:
+            async with asyncio.timeout(self.max_wait_s):
+                acquired = await self.semaphore.acquire()
+        except TimeoutError:
+            # The timeout can land just after the permit was granted; hand it back rather than leak it
+            if acquired:
+                self.semaphore.release()
+            self.timed_out += 1
+            self._reject("Server busy, queue wait exceeded.")
+        except asyncio.CancelledError:
+            if acquired:
+                self.semaphore.release()
+            raise
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        disconnected = threading.Event()
+        watcher = asyncio.create_task(self._watch_disconnect(http_request, disconnected))
+        try:
+            yield disconnected
+        finally:
+            watcher.cancel()
+            if disconnected.is_set():
+                self.cancelled += 1
+            self.in_flight -= 1
+            self.semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "cancelled": self.cancelled,
+        }
+
+def ensure_connected(disconnected: threading.Event):
+    """Stop a pipeline whose client has gone away"""
+    if disconnected.is_set():
+        raise HTTPException(status_code=499, detail="Client disconnected.")
@@ -0,0 +1,135 @@
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pydantic import BaseModel
+from typing import Dict, List
+
+class CacheMatch(BaseModel):
+    idea: str
+    similarity: float
+    reused: str  # "response" or "reddit_search"
+
+IDEA_STOPWORDS = {
+    "a", "an", "and", "app", "for", "from", "in", "into", "of", "on", "or", "platform", "that", "the", "to",
+    "tool", "using", "with", "your",
+}
+
+def idea_tokens(text: str) -> frozenset:
+    """Normalized word set used for near-duplicate matching"""
+    tokens = set()
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in IDEA_STOPWORDS:
+            continue
+        if len(word) > 5 and word.endswith("ing"):
+            word = word[:-3]
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.add(word)
+    return frozenset(tokens)
+
+def lsh_shape(threshold: float, num_perm: int, recall: float = 0.9) -> tuple:
+    """Bands and rows for num_perm hashes that make a pair at the threshold a candidate with the given recall.
+
+    Longer bands collide less often, so the longest band that keeps the recall is used.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Idea cache threshold must be in (0, 1], got {threshold}")
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    raise ValueError(f"Idea cache threshold {threshold} is too low for {num_perm} hashes")
+
+class IdeaIndex:
+    """MinHash LSH index from token sets to cached results.
+
+    Signatures are split into bands sized from the threshold by lsh_shape();
+    entries sharing any band bucket with the query are candidates, and the
+    best candidate by exact Jaccard similarity above the threshold is
+    returned. Common words make some buckets very
+    popular, so each bucket only keeps its max_bucket newest entries. That
+    bounds a lookup to bands * max_bucket similarity checks however large the
+    index grows; older entries stay reachable through their other bands.
+    """
+
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold: float, max_entries: int, ttl_s: float, num_perm: int = 60, max_bucket: int = 8):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.bands, self.rows = lsh_shape(threshold, num_perm)
+        self.max_bucket = max_bucket
+        rng = random.Random(42)
+        self.hash_params = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME))
+                            for _ in range(self.bands * self.rows)]
+        self.buckets: List[Dict[tuple, List[int]]] = [{} for _ in range(self.bands)]
+        self.entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    def _band_keys(self, tokens: frozenset) -> List[tuple]:
+        hashes = [zlib.crc32(token.encode()) for token in tokens]
+        signature = [min((a * h + b) % self._PRIME for h in hashes) for a, b in self.hash_params]
+        return [tuple(signature[i * self.rows:(i + 1) * self.rows]) for i in range(self.bands)]
+
+    def _remove(self, entry_id: int):
+        _, band_keys, _, _ = self.entries.pop(entry_id)
+        for band, key in enumerate(band_keys):
+            bucket = self.buckets[band].get(key)
+            if bucket is None or entry_id not in bucket:
+                continue
+            bucket.remove(entry_id)
+            if not bucket:
+                del self.buckets[band][key]
+
+    def add(self, tokens: frozenset, value):
+        if not tokens:
+            return
+        band_keys = self._band_keys(tokens)
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = (tokens, band_keys, value, time.time())
+            for band, key in enumerate(band_keys):
+                bucket = self.buckets[band].setdefault(key, [])
+                bucket.append(entry_id)
+                if len(bucket) > self.max_bucket:
+                    del bucket[0]
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+
+    def query(self, tokens: frozenset):
+        """Return (value, similarity) of the closest entry above the threshold, or None"""
+        if not tokens:
+            return None
+        band_keys = self._band_keys(tokens)
+        with self.lock:
+            candidates = set()
+            for band, key in enumerate(band_keys):
+                candidates.update(self.buckets[band].get(key, ()))
+            entries = [(entry_id, self.entries[entry_id]) for entry_id in candidates]
+
+        # Similarity checks run outside the lock so concurrent lookups and inserts don't queue behind them
+        now = time.time()
+        best = None
+        expired = []
+        for entry_id, (entry_tokens, _, value, added) in entries:
+            if now - added > self.ttl_s:
+                expired.append(entry_id)
+                continue
+            similarity = len(tokens & entry_tokens) / len(tokens | entry_tokens)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (value, similarity)
+        if expired:
+            with self.lock:
+                for entry_id in expired:
+                    if entry_id in self.entries:
+                        self._remove(entry_id)
+        return best
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+from typing import Dict, List
+import requests
+
+class UpstreamTransport:
+    """Send upstream HTTP calls, optionally recording them to or replaying them from a JSONL cassette.
+
+    In record mode each call is appended with its status, body and latency;
+    auth headers are never written and Reddit access tokens are redacted. Calls
+    that raise, like timeouts, are recorded with their exception type instead.
+    In replay mode calls are matched on method, URL, params and body, and
+    answered (or raised again) after the recorded latency divided by the replay
+    speed (0 means no delay).
+
+    Per-request decisions that depend on process state, like the adaptive
+    search tier or idea-cache hits, go through pinned() so a replay takes the
+    same path, and makes the same upstream calls, as the recorded run.
+    """
+
+    def __init__(self, service: str, mode: str, path: str, speed: float):
+        self.service = service
+        self.mode = mode
+        self.path = path
+        self.speed = speed
+        self.lock = threading.Lock()
+        self.recorded: Dict[str, List[dict]] = {}
+        self.pins: Dict[str, list] = {}
+        if mode == "replay":
+            self._load()
+
+    @staticmethod
+    def _key(method: str, url: str, params=None, json_body=None, data=None) -> str:
+        return json.dumps([method, url, params or {}, json_body, data], sort_keys=True)
+
+    @staticmethod
+    def _pin_key(endpoint: str, body: dict, name: str) -> str:
+        return json.dumps([endpoint, body, name], sort_keys=True)
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("kind") == "upstream":
+                    key = self._key(entry["method"], entry["url"], entry["params"], entry["json"], entry["data"])
+                    self.recorded.setdefault(key, []).append(entry)
+                elif entry.get("kind") == "pin":
+                    key = self._pin_key(entry["endpoint"], entry["body"], entry["name"])
+                    self.pins.setdefault(key, []).append(entry["value"])
+
+    def _append(self, entry: dict):
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def record_inbound(self, endpoint: str, body: dict):
+        """Record an incoming pipeline request so the workload can be rerun"""
+        if self.mode == "record":
+            self._append({"kind": "inbound", "service": self.service, "endpoint": endpoint, "body": body,
+                          "ts": time.time()})
+
+    def pinned(self, endpoint: str, body: dict, name: str, decide):
+        """Return decide() for a request, recording it, or its recorded value when replaying.
+
+        Falls back to deciding live when the cassette has no recorded value.
+        """
+        if self.mode == "replay":
+            with self.lock:
+                values = self.pins.get(self._pin_key(endpoint, body, name))
+                if values:
+                    return values.pop(0) if len(values) > 1 else values[0]
+            return decide()
+
+        value = decide()
+        if self.mode == "record":
+            self._append({"kind": "pin", "service": self.service, "endpoint": endpoint, "body": body,
+                          "name": name, "value": value})
+        return value
+
+    def _replay(self, method: str, url: str, params, json_body, data) -> requests.Response:
+        with self.lock:
+            entries = self.recorded.get(self._key(method, url, params, json_body, data))
+            if not entries:
+                raise requests.ConnectionError(f"No cassette entry for {method} {url}")
+            # Serve recordings in order, repeating the last one once they run out
+            entry = entries.pop(0) if len(entries) > 1 else entries[0]
+        if self.speed > 0:
+            time.sleep(entry["elapsed_ms"] / 1000 / self.speed)
+        if entry.get("error"):
+            raise getattr(requests.exceptions, entry["error"], requests.RequestException)(entry["error_message"])
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.url = url
+        resp.headers["Content-Type"] = "application/json"
+        resp._content = json.dumps(entry["response"]).encode()
+        return resp
+
+    def _entry(self, method: str, url: str, params, json_body, data, start: float,
+               resp: requests.Response = None, error: Exception = None) -> dict:
+        entry = {
+            "kind": "upstream",
+            "service": self.service,
+            "method": method,
+            "url": url,
+            "params": params,
+            "json": json_body,
+            "data": data,
+            "ts": start,
+            "elapsed_ms": round((time.time() - start) * 1000, 1),
+        }
+        if error is not None:
+            entry["error"] = type(error).__name__
+            entry["error_message"] = str(error)
+            return entry
+        try:
+            body = resp.json()
+        except ValueError:
+            body = resp.text
+        if isinstance(body, dict) and "access_token" in body:
+            body = {**body, "access_token": "replay-token"}
+        entry["status"] = resp.status_code
+        entry["response"] = body
+        return entry
+
+    def request(self, method: str, url: str, params=None, json=None, data=None, **kwargs) -> requests.Response:
+        if self.mode == "replay":
+            return self._replay(method, url, params, json, data)
+
+        start = time.time()
+        try:
+            resp = requests.request(method, url, params=params, json=json, data=data, **kwargs)
+        except requests.RequestException as e:
+            # Timeouts are the slowest calls in a workload, so the replay has to see them too
+            if self.mode == "record":
+                self._append(self._entry(method, url, params, json, data, start, error=e))
+            raise
+        if self.mode == "record":
+            self._append(self._entry(method, url, params, json, data, start, resp=resp))
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)